@@ -4,21 +4,44 @@ from __future__ import annotations
 import argparse
 import bisect
 import gzip
+import heapq
 import json
 import os
 import re
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:  # optional speedup; stdlib json is used otherwise
+    json_loads = json.loads
+
 MAX_UNICODE = "\U0010ffff"
 
 KANJI_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]")
-HIRAGANA_RE = re.compile(r"^[\u3040-\u309f\u30fc\u309d\u309e]+$")
-KATAKANA_RE = re.compile(r"^[\u30a0-\u30ff\u31f0-\u31ff]+$")
-LATINISH_RE = re.compile(r"^[A-Za-z0-9 \-_\"\'\"./:+&()Ａ-Ｚａ-ｚ０-９　－＿]+$")
+def char_range(first: str, last: str) -> frozenset:
+    return frozenset(chr(o) for o in range(ord(first), ord(last) + 1))
+
+# Character classes for detect_bucket/normalize_base; plain set checks beat the
+# regex engine on short query strings.
+HIRAGANA_CHARS = char_range("\u3040", "\u309f") | {"\u30fc"}
+KATAKANA_CHARS = char_range("\u30a0", "\u30ff") | char_range("\u31f0", "\u31ff")
+KANA_CHARS = HIRAGANA_CHARS | KATAKANA_CHARS
+LATINISH_CHARS = (
+    char_range("A", "Z") | char_range("a", "z") | char_range("0", "9")
+    | char_range("Ａ", "Ｚ") | char_range("ａ", "ｚ") | char_range("０", "９")
+    | frozenset(" -_\"'./:+&()　－＿")
+)
+
+# Katakana letters (ァ..ヶ) map to Hiragana (ぁ..ゖ) by -0x60
+KATA_TO_HIRA_TABLE = {o: o - 0x60 for o in range(0x30A1, 0x30F7)}
+# ASCII space -> ideographic space, printable ASCII -> fullwidth forms
+ASCII_TO_FULLWIDTH_TABLE = {0x20: 0x3000, **{o: o + 0xFEE0 for o in range(0x21, 0x7F)}}
 
 def repo_root_from_here() -> Path:
     return Path(__file__).resolve().parents[1]
@@ -37,51 +60,35 @@ def resolve_json_variant(path: Path) -> Optional[Path]:
     return None
 
 def load_json_any(path: Path) -> Any:
+    data = path.read_bytes()
     if path.name.endswith(".json.gz"):
-        with gzip.open(path, "rt", encoding="utf-8") as f:
-            return json.load(f)
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+        data = gzip.decompress(data)
+    return json_loads(data)
 
 def iter_jsonl_gz(path: Path) -> Iterable[dict]:
-    with gzip.open(path, "rt", encoding="utf-8") as f:
+    with gzip.open(path, "rb") as f:
         for line in f:
             line = line.strip()
             if not line:
                 continue
-            yield json.loads(line)
+            yield json_loads(line)
 
 def ascii_to_fullwidth(s: str) -> str:
-    out = []
-    for ch in s:
-        code = ord(ch)
-        if ch == " ":
-            out.append("\u3000")
-        elif 0x21 <= code <= 0x7E:
-            out.append(chr(code + 0xFEE0))
-        else:
-            out.append(ch)
-    return "".join(out)
+    return s.translate(ASCII_TO_FULLWIDTH_TABLE)
 
+@lru_cache(maxsize=4096)
 def kata_to_hira(s: str) -> str:
     # Convert Katakana to Hiragana (keeps non-katakana unchanged).
-    out = []
-    for ch in s:
-        o = ord(ch)
-        # Katakana letters range (ァ..ヶ) map to Hiragana (ぁ..ゖ) by -0x60
-        if 0x30A1 <= o <= 0x30F6:
-            out.append(chr(o - 0x60))
-        else:
-            out.append(ch)
-    return "".join(out)
+    return s.translate(KATA_TO_HIRA_TABLE)
 
+@lru_cache(maxsize=4096)
 def normalize_base(q: str) -> str:
     # Shared baseline normalization:
     # - NFKC normalization
     # - casefold (for Latin)
     # - Latin-ish ASCII → fullwidth (best-effort; NOT romaji search)
     q2 = unicodedata.normalize("NFKC", q).casefold()
-    if LATINISH_RE.match(q2):
+    if set(q2) <= LATINISH_CHARS:
         q2 = ascii_to_fullwidth(q2)
     return q2
 
@@ -90,7 +97,8 @@ def normalize_query_search(q: str) -> str:
     # This allows katakana queries like タクシー to match keys indexed as たくしー.
     return kata_to_hira(normalize_base(q))
 
-def normalize_query_search_variants(q: str) -> list[str]:
+@lru_cache(maxsize=4096)
+def normalize_query_search_variants(q: str) -> Tuple[str, ...]:
     """Generate multiple normalized query candidates for search.
 
     Rationale:
@@ -99,30 +107,32 @@ def normalize_query_search_variants(q: str) -> list[str]:
     - mixed JP+ASCII queries may require a second normalization attempt
 
     The first item is always the primary normalization used historically.
+    Results are memoized (as a tuple) because every (domain, mode) search of
+    one query normalizes the same string again.
     """
     nfkc = unicodedata.normalize("NFKC", q)
+    if not nfkc:
+        return ()
+    # Common cases first; both yield exactly what the general path would.
+    if nfkc.isascii():
+        # casefold is done by normalize_base anyway and kata_to_hira is a no-op
+        fold = nfkc.casefold()
+        candidates = [normalize_base(fold), ascii_to_fullwidth(fold), ascii_to_fullwidth(nfkc)]
+        return tuple(dict.fromkeys(candidates))
+    if set(nfkc) <= KANA_CHARS:
+        # no case and no ASCII: every variant collapses to the hiragana form
+        return (kata_to_hira(nfkc),)
+
     base_raw = nfkc
     base_fold = nfkc.casefold()
 
-    def fullwidth_mixed(s: str) -> str:
-        # convert ASCII in mixed strings to fullwidth; keep non-ASCII unchanged
-        out = []
-        for ch in s:
-            code = ord(ch)
-            if ch == " ":
-                out.append("\u3000")
-            elif 0x21 <= code <= 0x7E:
-                out.append(chr(code + 0xFEE0))
-            else:
-                out.append(ch)
-        return "".join(out)
-
     candidates = []
     for b in (base_fold, base_raw):
         # primary path: (casefolded first) + ascii->fullwidth only when purely latinish (via normalize_base)
         # but for mixed strings we also add fullwidth-mixed variants
         candidates.append(kata_to_hira(normalize_base(b)))
-        candidates.append(kata_to_hira(fullwidth_mixed(b)))
+        # mixed strings: ASCII -> fullwidth, non-ASCII unchanged
+        candidates.append(kata_to_hira(ascii_to_fullwidth(b)))
     # De-duplicate preserving order
     seen=set()
     out=[]
@@ -130,7 +140,7 @@ def normalize_query_search_variants(q: str) -> list[str]:
         if c and c not in seen:
             seen.add(c)
             out.append(c)
-    return out
+    return tuple(out)
 
 
 def normalize_query_lookup_candidates(q: str) -> list[str]:
@@ -143,12 +153,18 @@ def normalize_query_lookup_candidates(q: str) -> list[str]:
         return [q0, q1]
     return [q0]
 
+@lru_cache(maxsize=4096)
 def detect_bucket(q: str) -> str:
-    if HIRAGANA_RE.match(q):
+    # One pass over the query to collect its characters; the class checks are
+    # then subset tests on that (small) set.
+    chars = set(q)
+    if not chars:
+        return "other"
+    if chars <= HIRAGANA_CHARS:
         return "hiragana"
-    if KATAKANA_RE.match(q):
+    if chars <= KATAKANA_CHARS:
         return "katakana"
-    if LATINISH_RE.match(q):
+    if chars <= LATINISH_CHARS:
         return "latin"
     # If it contains any kanji, prefer kanji bucket
     if KANJI_RE.search(q):
@@ -173,63 +189,77 @@ def load_word_rank(repo: str) -> Dict[str, Dict[str, Any]]:
     obj = load_json_any(p)
     return obj["rank"]
 
+@lru_cache(maxsize=1)
+def load_search_manifest(repo: str) -> dict:
+    return load_json_any(Path(repo) / "data" / "search" / "search" / "manifest.json")
+
+@lru_cache(maxsize=1)
+def load_seed_word_rank(repo: str) -> Optional[Dict[str, Any]]:
+    root = Path(repo)
+    rank_path = resolve_json_variant(root/"data/seed/index/word_rank.json") or (root/"data/seed/index/word_rank.json")
+    if not rank_path.exists():
+        return None
+    return load_json_any(rank_path)
+
 def prefix_range(sorted_keys: List[str], prefix: str) -> Tuple[int, int]:
     left = bisect.bisect_left(sorted_keys, prefix)
     right = bisect.bisect_right(sorted_keys, prefix + MAX_UNICODE)
     return left, right
 
+def resolve_search_base(bases: List[str], bucket: str) -> str:
+    for b in bases:
+        if b.endswith(bucket):
+            return b
+    return bases[-1]
+
 def search_prefix(repo: Path, domain: str, mode: str, query: str, limit: int, max_keys: int, common_first: bool) -> List[dict]:
-    manifest = load_json_any(repo / "data" / "search" / "search" / "manifest.json")
+    manifest = load_search_manifest(str(repo))
     q_variants = normalize_query_search_variants(query)
 
-    # Optional rank list for common-first scoring (words only)
+    # Optional rank list for common-first scoring (words only); loaded on the
+    # first matched key so queries without matches never parse it.
     rank = None
-    if domain == "words":
-        rank_path = resolve_json_variant(repo/"data/seed/index/word_rank.json") or (repo/"data/seed/index/word_rank.json")
-        if rank_path.exists():
-            rank = load_json_any(rank_path)
+    rank_pending = domain == "words"
 
-    results: List[Tuple] = []
+    # Group variants by the index they resolve to, so each index is scanned
+    # once per query and a (key, id) pair is scored only once.
+    bases = manifest["domains"][domain][mode]
+    by_base: Dict[str, List[str]] = {}
     for qn in q_variants:
-        bucket = detect_bucket(qn)
-        bases = manifest["domains"][domain][mode]
-        base = None
-        for b in bases:
-            if b.endswith(bucket):
-                base = b
-                break
-        if base is None:
-            base = bases[-1]
+        by_base.setdefault(resolve_search_base(bases, detect_bucket(qn)), []).append(qn)
 
+    results: List[Tuple] = []
+    for base, qns in by_base.items():
         keys, mp = load_search_index(str(repo), base)
-
-        # Find matching keys by prefix
-        prefix = qn
-        i = bisect.bisect_left(keys, prefix)
-        match_keys = []
-        while i < len(keys) and keys[i].startswith(prefix):
-            match_keys.append(keys[i])
-            i += 1
-            if len(match_keys) >= max_keys:
-                break
-
-        # Build scored results
+        # A key is exact if it equals any variant scanned in this index (the
+        # variant equal to it is always the first key of its own range).
+        qset = set(qns)
         seen=set()
-        for k in match_keys:
-            ids = mp.get(k, [])
-            for wid in ids:
-                if (k, wid) in seen:
-                    continue
-                seen.add((k, wid))
-                if domain == "words" and rank is not None:
-                    info = rank.get(str(wid), {"score": 0, "common": False})
-                    score = int(info.get("score", 0))
-                    common = 1 if info.get("common") else 0
-                else:
-                    score, common = 0, 0
-                exact = 1 if k == qn else 0
-                # sort: exact desc, common desc (optional), score desc, shorter key, id
-                results.append((exact, common if common_first else 0, score, -len(k), k, wid))
+        for qn in qns:
+            # Find matching keys by prefix: both ends of the range are bisected,
+            # so no per-key startswith() scan is needed.
+            left, right = prefix_range(keys, qn)
+            match_keys = keys[left:min(right, left + max_keys)]
+            if rank_pending and match_keys:
+                rank = load_seed_word_rank(str(repo))
+                rank_pending = False
+
+            # Build scored results
+            for k in match_keys:
+                ids = mp.get(k, [])
+                for wid in ids:
+                    if (k, wid) in seen:
+                        continue
+                    seen.add((k, wid))
+                    if domain == "words" and rank is not None:
+                        info = rank.get(str(wid), {"score": 0, "common": False})
+                        score = int(info.get("score", 0))
+                        common = 1 if info.get("common") else 0
+                    else:
+                        score, common = 0, 0
+                    exact = 1 if k in qset else 0
+                    # sort: exact desc, common desc (optional), score desc, shorter key, id
+                    results.append((exact, common if common_first else 0, score, -len(k), k, wid))
 
     # Deduplicate by id (keep best key across all variants)
     best_by_id: Dict[int, Tuple] = {}
@@ -238,7 +268,7 @@ def search_prefix(repo: Path, domain: str, mode: str, query: str, limit: int, ma
         if wid not in best_by_id or t > best_by_id[wid]:
             best_by_id[wid] = t
 
-    final = sorted(best_by_id.values(), reverse=True)[:limit]
+    final = heapq.nlargest(limit, best_by_id.values())
     out=[]
     for t in final:
         exact, common, score, _, k, wid = t
@@ -281,12 +311,48 @@ def load_word_chunk(repo: str, chunk_path: str) -> Dict[int, dict]:
     entries = obj["entries"]
     return {int(e["id"]): e for e in entries}
 
+@lru_cache(maxsize=4)
+def load_json_text(path: str) -> str:
+    p = Path(path)
+    data = p.read_bytes()
+    if p.name.endswith(".json.gz"):
+        data = gzip.decompress(data)
+    return data.decode("utf-8")
+
+ENTRY_DECODER = json.JSONDecoder()
+ENTRY_START_RE = re.compile(r'\{"id":(\d+),')
+
+@lru_cache(maxsize=4)
+def load_entry_offsets(path: str) -> Dict[int, int]:
+    # One regex pass per chunk; afterwards every entry is an O(1) seek into the text.
+    text = load_json_text(path)
+    return {int(m.group(1)): m.start() for m in ENTRY_START_RE.finditer(text)}
+
+def find_entry_by_id(path: Path, wid: int) -> Optional[dict]:
+    """Decode a single entry from a words chunk without parsing the whole file.
+
+    Chunks are minified with each entry written as `{"id":<int>,...`; nested
+    objects only carry string ids, so the marker is unique. Returns None when
+    the marker is not found; callers then fall back to the full loader.
+    """
+    if not path.exists():
+        return None
+    i = load_entry_offsets(str(path)).get(wid)
+    if i is None:
+        return None
+    entry, _ = ENTRY_DECODER.raw_decode(load_json_text(str(path)), i)
+    return entry
+
+def en_words_path(root: Path, range_start: int, range_end: int) -> Path:
+    p = root/f"data/seed/lang/en_words_{range_start}_{range_end}.json"
+    return resolve_json_variant(p) or p
+
 @lru_cache(maxsize=4)
 def load_word_lang_chunk(repo: str, lang: str, range_start: int, range_end: int) -> Dict[int, dict]:
     root = Path(repo)
     # English is in data/seed/lang; Italian common is in data/lang/it_common/lang
     if lang == "en":
-        p = resolve_json_variant(root/f"data/seed/lang/en_words_{range_start}_{range_end}.json") or (root/f"data/seed/lang/en_words_{range_start}_{range_end}.json")
+        p = en_words_path(root, range_start, range_end)
         if not p.exists():
             return {}
         obj = load_json_any(p)
@@ -319,10 +385,16 @@ def list_it_word_chunks(repo: str) -> List[Tuple[int, int, Path]]:
     chunks.sort()
     return chunks
 
+@lru_cache(maxsize=1)
+def word_chunk_starts(repo: str) -> List[int]:
+    return [a for a, _, _ in list_word_chunks(repo)]
+
 def find_word_chunk_for_id(repo: Path, wid: int) -> Optional[Tuple[int,int,Path]]:
-    for a,b,p in list_word_chunks(str(repo)):
-        if a <= wid <= b:
-            return a,b,p
+    # Chunks are sorted by start id and do not overlap.
+    chunks = list_word_chunks(str(repo))
+    i = bisect.bisect_right(word_chunk_starts(str(repo)), wid) - 1
+    if i >= 0 and wid <= chunks[i][1]:
+        return chunks[i]
     return None
 
 def word_card(repo: Path, wid: int, lang_pref: str = "it") -> dict:
@@ -330,10 +402,11 @@ def word_card(repo: Path, wid: int, lang_pref: str = "it") -> dict:
     if not chunk:
         return {"id": wid, "error": "word id out of range"}
     a,b,p = chunk
-    core = load_word_chunk(str(repo), str(p)).get(wid)
+    # A card needs one entry per file: decode just that entry when it can be located.
+    core = find_entry_by_id(p, wid) or load_word_chunk(str(repo), str(p)).get(wid)
     if not core:
         return {"id": wid, "error": "word not found in chunk"}
-    en = load_word_lang_chunk(str(repo), "en", a, b).get(wid, {})
+    en = find_entry_by_id(en_words_path(repo, a, b), wid) or load_word_lang_chunk(str(repo), "en", a, b).get(wid, {})
     it = load_word_lang_chunk(str(repo), "it", a, b).get(wid, {}) if lang_pref == "it" else {}
     # Merge senses by sense-id
     senses = []
@@ -400,8 +473,9 @@ def kanji_card(repo: Path, ch: str) -> dict:
         "meanings_en": en,
     }
 
-def kanji_list_by_order(repo: Path, start: int, limit: int) -> List[dict]:
-    entries = load_kanji(str(repo))["entries"].values()
+@lru_cache(maxsize=1)
+def kanji_sorted_by_order(repo: str) -> List[dict]:
+    entries = load_kanji(repo)["entries"].values()
     ordered = []
     for e in entries:
         if not isinstance(e, dict):
@@ -411,6 +485,10 @@ def kanji_list_by_order(repo: Path, start: int, limit: int) -> List[dict]:
         if isinstance(ordv, int):
             ordered.append(e)
     ordered.sort(key=lambda e: (e.get("education") or {}).get("order_overall", 10**9))
+    return ordered
+
+def kanji_list_by_order(repo: Path, start: int, limit: int) -> List[dict]:
+    ordered = kanji_sorted_by_order(str(repo))
     out = []
     for e in ordered[max(0, start-1): max(0, start-1) + limit]:
         edu = e.get("education") or {}
@@ -429,10 +507,18 @@ def load_kana(repo: str) -> list:
     obj = load_json_any(p)
     return obj.get("entries", [])
 
+@lru_cache(maxsize=1)
+def kana_by_symbol(repo: str) -> Dict[str, dict]:
+    out: Dict[str, dict] = {}
+    for e in load_kana(repo):
+        if "symbol" in e:
+            out.setdefault(e["symbol"], e)  # first entry wins, as with the former linear scan
+    return out
+
 def kana_card(repo: Path, symbol: str) -> dict:
-    for e in load_kana(str(repo)):
-        if e.get("symbol") == symbol:
-            return e
+    e = kana_by_symbol(str(repo)).get(symbol)
+    if e is not None:
+        return e
     return {"symbol": symbol, "error": "kana not found"}
 
 # ----- Names -----
@@ -454,19 +540,62 @@ def load_names_lang_en_chunk(repo: str, lang_file: str) -> Dict[int, dict]:
     p = root/"data/names"/lang_file
     return {int(e["id"]): e for e in iter_jsonl_gz(p)}
 
+@lru_cache(maxsize=1)
+def list_name_chunks(repo: str) -> Tuple[List[int], List[Tuple[int, int, dict]]]:
+    chunks = sorted(
+        ((int(ch["start_id"]), int(ch["end_id"]), ch) for ch in load_names_meta(repo).get("chunks", [])),
+        key=lambda c: c[0],
+    )
+    return [a for a, _, _ in chunks], chunks
+
+@lru_cache(maxsize=6)
+def load_jsonl_gz_bytes(path: str) -> bytes:
+    return gzip.decompress(Path(path).read_bytes())
+
+JSONL_ROW_PREFIX = b'{"id":'
+
+def find_jsonl_row_by_id(path: Path, rid: int) -> Optional[dict]:
+    """Decode a single row of a minified names JSONL chunk.
+
+    Rows are written one per line as `{"id":<int>,...`, so a byte search for
+    that marker finds the row without parsing the other ~80k lines. Returns
+    None when the id is absent; raises LookupError when the file does not use
+    this layout so callers can fall back to the full loader.
+    """
+    data = load_jsonl_gz_bytes(str(path))
+    if not data.startswith(JSONL_ROW_PREFIX):
+        raise LookupError(path)
+    marker = JSONL_ROW_PREFIX + b"%d," % rid
+    if data.startswith(marker):
+        i = 0
+    else:
+        i = data.find(b"\n" + marker)
+        if i < 0:
+            return None
+        i += 1
+    j = data.find(b"\n", i)
+    return json_loads(data[i:j] if j >= 0 else data[i:])
+
 def find_name_chunk(repo: Path, nid: int) -> Optional[dict]:
-    meta = load_names_meta(str(repo))
-    for ch in meta.get("chunks", []):
-        if int(ch["start_id"]) <= nid <= int(ch["end_id"]):
-            return ch
+    starts, chunks = list_name_chunks(str(repo))
+    i = bisect.bisect_right(starts, nid) - 1
+    if i >= 0 and nid <= chunks[i][1]:
+        return chunks[i][2]
     return None
 
 def name_card(repo: Path, nid: int) -> dict:
     ch = find_name_chunk(repo, nid)
     if not ch:
         return {"id": nid, "error": "name id out of range"}
-    core = load_names_chunk(str(repo), ch["core_file"]).get(nid)
-    en = load_names_lang_en_chunk(str(repo), ch["lang_en_file"]).get(nid, {})
+    names = Path(repo)/"data/names"
+    try:
+        core = find_jsonl_row_by_id(names/ch["core_file"], nid)
+    except LookupError:
+        core = load_names_chunk(str(repo), ch["core_file"]).get(nid)
+    try:
+        en = find_jsonl_row_by_id(names/ch["lang_en_file"], nid) or {}
+    except LookupError:
+        en = load_names_lang_en_chunk(str(repo), ch["lang_en_file"]).get(nid, {})
     return {
         "id": nid,
         "primary": core.get("primary") if core else None,
@@ -528,9 +657,22 @@ def category_list(repo: Path, lang: str) -> List[dict]:
         out.append({"id": cid, "title": meta.get("title", cid), "description": meta.get("description")})
     return out
 
+def load_category_items(repo: str, cid: str) -> Optional[List[int]]:
+    # items/{cid}.json.gz is the shipped, prebuilt slice of the category index;
+    # only trust it for categories listed in the manifest.
+    man = load_categories_manifest(repo)
+    if cid not in man.get("categories", []):
+        return None
+    pattern = man.get("item_file_pattern", "items/{category_id}.json.gz")
+    p = resolve_json_variant(Path(repo)/"data/categories"/pattern.format(category_id=cid))
+    if not p:
+        return None
+    return load_json_any(p).get("word_ids")
+
 def category_show(repo: Path, cid: str, limit: int) -> dict:
-    idx = build_category_index(str(repo))
-    ids = idx.get(cid, [])
+    ids = load_category_items(str(repo), cid)
+    if ids is None:
+        ids = build_category_index(str(repo)).get(cid, [])
     return {"category_id": cid, "count": len(ids), "word_ids": ids[:limit]}
 
 
@@ -543,20 +685,25 @@ def cmd_search(args) -> int:
     q = args.query
 
     domains = ["words","names"] if domain == "all" else [domain]
+    modes = ["surface","reading"] if mode == "auto" else [mode]
+    tasks = [(d, m) for d in domains for m in modes]
     gathered: List[dict] = []
 
-    for d in domains:
-        modes = ["surface","reading"] if mode == "auto" else [mode]
-        for m in modes:
-            res = search_prefix(repo, d, m, q, limit=args.limit, max_keys=args.max_keys, common_first=args.common_first)
+    def run(task: Tuple[str, str]) -> List[dict]:
+        d, m = task
+        return search_prefix(repo, d, m, q, limit=args.limit, max_keys=args.max_keys, common_first=args.common_first)
+
+    # Each (domain, mode) reads its own index files; gunzip releases the GIL,
+    # so cold loads overlap. map() keeps results in task order.
+    with ThreadPoolExecutor(max_workers=len(tasks)) as ex:
+        for (d, m), res in zip(tasks, ex.map(run, tasks)):
             for r in res:
                 r["domain"] = d
                 r["mode"] = m
                 gathered.append(r)
 
-    # Dedupe across modes (and optionally domains)
-    best: Dict[Tuple[str,int], Tuple] = {}
-    keep: Dict[Tuple[str,int], dict] = {}
+    # Dedupe across modes (and optionally domains): keep the best-ranked row per (domain, id)
+    best: Dict[Tuple[str,int], Tuple[Tuple, dict]] = {}
 
     for r in gathered:
         key = (r["domain"], int(r["id"]))
@@ -566,19 +713,13 @@ def cmd_search(args) -> int:
         prefer_surface = 1 if r.get("mode") == "surface" else 0
         key_len = int(r.get("key_len", len(r.get("matched_key",""))))
         t = (exact, common, score, prefer_surface, -key_len)
-        if key not in best or t > best[key]:
-            best[key] = t
-            keep[key] = r
-
-    final = sorted(keep.values(), key=lambda r: (
-        1 if r.get("exact") else 0,
-        1 if (args.common_first and r.get("common")) else 0,
-        int(r.get("score", 0)),
-        1 if r.get("mode") == "surface" else 0,
-        -int(r.get("key_len", len(r.get("matched_key","")))),
-    ), reverse=True)
-
-    final = final[:args.limit]
+        cur = best.get(key)
+        if cur is None or t > cur[0]:
+            best[key] = (t, r)
+
+    # Rank by the sort tuples already computed for the dedupe.
+    top = heapq.nlargest(args.limit, best.values(), key=lambda tr: tr[0])
+    final = [r for _, r in top]
 
     if args.format == "json":
         out = []
@@ -2,31 +2,81 @@
 from __future__ import annotations
 
 import argparse
+import heapq
+import importlib.util
+import io
 import json
 import os
-import subprocess
+import sys
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterable, List, Tuple
 
 
-def run(cmd: List[str], cwd: Path) -> Tuple[int, str]:
-    p = subprocess.run(cmd, cwd=str(cwd), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-    return p.returncode, p.stdout.strip()
+def load_tool(tools_dir: Path, tool: str) -> Any:
+    # Load the validator from the checked repository's own tools/ (the old
+    # subprocess ran <repo>/tools/<tool>.py), not from preflight's directory.
+    spec = importlib.util.spec_from_file_location(tool, tools_dir / f"{tool}.py")
+    module = importlib.util.module_from_spec(spec)
+    # Registered under its plain name so worker processes can unpickle its functions.
+    sys.modules[tool] = module
+    spec.loader.exec_module(module)
+    return module
 
 
-def largest_files(root: Path, top_n: int = 15) -> List[Dict[str, Any]]:
-    items: List[Tuple[int, str]] = []
-    for r, _, files in os.walk(root):
-        rp = Path(r)
-        for fn in files:
-            fp = rp / fn
+def run(repo: Path, tool: str, argv: List[str]) -> Tuple[int, str]:
+    # Validators run in this interpreter: no Python start-up and stdlib re-import
+    # per check. stdout/stderr are captured as the subprocess call used to.
+    tools_dir = repo / "tools"
+    saved_path = list(sys.path)
+    saved_module = sys.modules.get(tool)
+    sys.path.insert(0, str(tools_dir))  # spawned pool workers re-import from here
+    buf = io.StringIO()
+    with redirect_stdout(buf), redirect_stderr(buf):
+        try:
+            rc = load_tool(tools_dir, tool).main(argv)
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                rc = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+                rc = 1
+        except Exception:
+            traceback.print_exc()
+            rc = 1
+        finally:
+            sys.path[:] = saved_path
+            if saved_module is None:
+                sys.modules.pop(tool, None)
+            else:
+                sys.modules[tool] = saved_module
+    return rc, buf.getvalue().strip()
+
+
+def iter_file_sizes(top: str) -> Iterable[Tuple[int, str]]:
+    # DirEntry.stat() is cached and dirent types spare a stat for directories.
+    try:
+        it = os.scandir(top)
+    except OSError:
+        return
+    with it:
+        for entry in it:
             try:
-                sz = fp.stat().st_size
-            except Exception:
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        yield from iter_file_sizes(entry.path)
+                    continue
+                sz = entry.stat().st_size
+            except OSError:
                 continue
-            items.append((sz, str(fp.relative_to(root))))
-    items.sort(reverse=True)
-    return [{"path": rel, "bytes": sz} for sz, rel in items[:top_n]]
+            yield sz, entry.path
+
+
+def largest_files(root: Path, top_n: int = 15) -> List[Dict[str, Any]]:
+    root_prefix_len = len(os.path.join(str(root), ""))
+    top = heapq.nlargest(top_n, ((sz, path[root_prefix_len:]) for sz, path in iter_file_sizes(str(root))))
+    return [{"path": rel, "bytes": sz} for sz, rel in top]
 
 
 def main() -> int:
@@ -40,12 +90,12 @@ def main() -> int:
     repo = Path(args.repo_root).resolve()
     results: Dict[str, Any] = {"ok": True, "mode": args.mode, "checks": {}}
 
-    rc, out = run(["python", "tools/validate_db.py", "--repo-root", ".", "--mode", args.mode], cwd=repo)
+    rc, out = run(repo, "validate_db", ["--repo-root", str(repo), "--mode", args.mode])
     results["checks"]["validate_db"] = {"rc": rc, "output": out}
     if rc != 0:
         results["ok"] = False
 
-    rc, out = run(["python", "tools/validate_schemas.py", "--repo-root", ".", "--mode", args.mode], cwd=repo)
+    rc, out = run(repo, "validate_schemas", ["--repo-root", str(repo), "--mode", args.mode])
     results["checks"]["validate_schemas"] = {"rc": rc, "output": out}
     if rc != 0:
         results["ok"] = False
@@ -53,7 +103,7 @@ def main() -> int:
     # Cross-file relations (sampling in fast, more exhaustive in full)
     rel_script = repo / "tools" / "validate_relations.py"
     if rel_script.exists():
-        rc, out = run(["python", "tools/validate_relations.py", "--repo-root", ".", "--mode", args.mode], cwd=repo)
+        rc, out = run(repo, "validate_relations", ["--repo-root", str(repo), "--mode", args.mode])
         results["checks"]["validate_relations"] = {"rc": rc, "output": out}
         if rc != 0:
             results["ok"] = False
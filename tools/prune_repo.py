@@ -7,23 +7,20 @@ import os
 from pathlib import Path
 from typing import List, Tuple
 
-def find_dupes(root: Path) -> List[Tuple[Path, Path]]:
-    out: List[Tuple[Path, Path]] = []
-    for r, _, files in os.walk(root):
-        rp = Path(r)
-        s = set(files)
-        for fn in files:
-            if fn.endswith(".json") and (fn + ".gz") in s:
-                out.append((rp/fn, rp/(fn+".gz")))
-    return out
-
-def find_pycache(root: Path) -> List[Path]:
-    out=[]
-    for r, dirs, _ in os.walk(root):
-        for d in dirs:
-            if d == "__pycache__":
-                out.append(Path(r)/d)
-    return out
+def find_pycache_and_dupes(root: Path) -> Tuple[List[Path], List[Tuple[Path, Path]]]:
+    # One os.walk serves both checks; each directory's listing is read once.
+    pycache: List[Path] = []
+    dupes: List[Tuple[Path, Path]] = []
+    for r, dirs, files in os.walk(root):
+        if "__pycache__" in dirs:
+            pycache.extend(Path(r)/d for d in dirs if d == "__pycache__")
+        gz = {fn for fn in files if fn.endswith(".json.gz")}
+        if gz:
+            rp = Path(r)
+            for fn in files:
+                if fn.endswith(".json") and (fn + ".gz") in gz:
+                    dupes.append((rp/fn, rp/(fn+".gz")))
+    return pycache, dupes
 
 def main() -> int:
     ap = argparse.ArgumentParser(description="Prune repo noise: __pycache__ and redundant .json when .json.gz exists.")
@@ -34,16 +31,19 @@ def main() -> int:
 
     repo = Path(args.repo_root).resolve()
     actions = {"pycache_dirs": [], "json_removed": [], "dry_run": not args.write}
+    # os.walk paths start with the resolved repo, so relative paths are string slices.
+    root_prefix_len = len(os.path.join(str(repo), ""))
 
-    for p in find_pycache(repo):
-        actions["pycache_dirs"].append(str(p.relative_to(repo)))
+    pycache, dupes = find_pycache_and_dupes(repo)
+    for p in pycache:
+        actions["pycache_dirs"].append(str(p)[root_prefix_len:])
         if args.write:
             import shutil
             shutil.rmtree(p, ignore_errors=True)
 
     if args.remove_json_when_gz_exists:
-        for j, _ in find_dupes(repo):
-            actions["json_removed"].append(str(j.relative_to(repo)))
+        for j, _ in dupes:
+            actions["json_removed"].append(str(j)[root_prefix_len:])
             if args.write:
                 try:
                     j.unlink()
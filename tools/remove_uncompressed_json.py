@@ -2,21 +2,48 @@
 from __future__ import annotations
 
 import argparse
+import fnmatch
 import json
 import os
+import re
 from pathlib import Path
-from typing import List
+from typing import Any, Iterable, List
 
 def load_plan(plan_path: Path) -> dict:
     with plan_path.open("r", encoding="utf-8") as f:
         return json.load(f)
 
-def match_any(path: str, patterns: List[str]) -> bool:
-    import fnmatch
-    for pat in patterns:
-        if fnmatch.fnmatch(path, pat):
-            return True
-    return False
+def globs_to_regex(patterns: List[str]) -> str:
+    if not patterns:
+        return r"(?!)"  # matches nothing
+    return "|".join(fnmatch.translate(p) for p in patterns)
+
+def compile_policy(policy: dict[str, Any]) -> re.Pattern[str]:
+    # One match per path: alternatives are tried left to right, so exclusions
+    # take precedence over compress_to_json_gz.
+    skip = policy.get("exclusions", [])
+    compress = policy.get("compress_to_json_gz", [])
+    return re.compile(f"(?P<skip>{globs_to_regex(skip)})|(?P<compress>{globs_to_regex(compress)})")
+
+def iter_json_files(root: str) -> Iterable[os.DirEntry[str]]:
+    # os.scandir walk in os.walk order (a directory's files, then its subdirectories;
+    # symlinked directories are not followed), keeping only matching entries.
+    try:
+        it = os.scandir(root)
+    except OSError:
+        return
+    files = []
+    subdirs = []
+    with it:
+        for entry in it:
+            if entry.is_dir():
+                if not entry.is_symlink():
+                    subdirs.append(entry.path)
+            elif entry.name.endswith(".json"):
+                files.append(entry)
+    yield from files
+    for d in subdirs:
+        yield from iter_json_files(d)
 
 def main() -> int:
     p = argparse.ArgumentParser(description="Remove uncompressed .json files that have a corresponding .json.gz file (according to compression_plan.json).")
@@ -30,30 +57,22 @@ def main() -> int:
     if not plan_path.exists():
         raise SystemExit(f"Plan not found: {plan_path}")
     plan = load_plan(plan_path)
-    compress_patterns = plan.get("policy", {}).get("compress_to_json_gz", [])
-    exclusions = plan.get("policy", {}).get("exclusions", [])
+    matcher = compile_policy(plan.get("policy", {}))
 
     deleted = []
     skipped = []
 
-    for r, _, files in os.walk(repo / "data"):
-        rp = Path(r)
-        for fn in files:
-            if not fn.endswith(".json"):
-                continue
-            fp = rp / fn
-            rel = str(fp.relative_to(repo)).replace(os.sep, "/")
-            if match_any(rel, exclusions):
-                skipped.append(rel)
-                continue
-            if not match_any(rel, compress_patterns):
-                skipped.append(rel)
-                continue
-            gz = fp.with_name(fn + ".gz")
-            if gz.exists():
-                if args.write:
-                    fp.unlink()
-                deleted.append(rel)
+    root_prefix_len = len(os.path.join(str(repo), ""))
+    for entry in iter_json_files(str(repo / "data")):
+        rel = entry.path[root_prefix_len:].replace(os.sep, "/")
+        m = matcher.match(rel)
+        if m is None or m.group("compress") is None:
+            skipped.append(rel)
+            continue
+        if os.path.exists(entry.path + ".gz"):
+            if args.write:
+                os.unlink(entry.path)
+            deleted.append(rel)
 
     out = {"write": bool(args.write), "deleted": deleted, "deleted_count": len(deleted), "skipped_count": len(skipped)}
     print(json.dumps(out, ensure_ascii=False, indent=2))
@@ -5,64 +5,109 @@ import argparse
 import gzip
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, Iterable, Tuple
+from typing import Any, Iterable, Tuple
 
-FORBIDDEN_KEYS = {
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is used otherwise
+    orjson = None
+
+try:
+    # Only used to read: ISA-L inflates faster; writes keep stdlib gzip's output.
+    from isal import igzip as gzip_mod
+except ImportError:  # optional speedup; stdlib gzip is used otherwise
+    gzip_mod = gzip
+
+# Any key containing "generated_at" is forbidden too (see the key checks below).
+FORBIDDEN_KEYS = frozenset({
     "generated_at_utc", "generated_at", "created_at", "build_stamp", "built_at",
     "timestamp", "time_utc", "supersedes", "superseded_by",
-}
+})
 
 def iter_json_paths(data_root: Path) -> Iterable[Path]:
-    for r, _, files in os.walk(data_root):
-        rp = Path(r)
-        for fn in files:
-            if fn.endswith(".json") or fn.endswith(".json.gz"):
-                yield rp / fn
+    # os.scandir walk in os.walk order (a directory's files, then its subdirectories;
+    # symlinked directories are not followed), keeping only matching entries.
+    try:
+        it = os.scandir(data_root)
+    except OSError:
+        return
+    files = []
+    subdirs = []
+    with it:
+        for entry in it:
+            if entry.is_dir():
+                if not entry.is_symlink():
+                    subdirs.append(entry.path)
+            elif entry.name.endswith(".json") or entry.name.endswith(".json.gz"):
+                files.append(entry)
+    yield from (Path(entry.path) for entry in files)
+    for d in subdirs:
+        yield from iter_json_paths(d)
 
 def load_json(path: Path) -> Any:
+    data = path.read_bytes()
     if path.name.endswith(".json.gz"):
-        with gzip.open(path, "rt", encoding="utf-8") as f:
-            return json.load(f)
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+        data = gzip_mod.decompress(data)
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 def dump_json(path: Path, obj: Any, pretty: bool) -> None:
+    # Encode once and write once: no text-mode layer between the encoder and gzip.
+    if orjson is not None:
+        data = orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE | (orjson.OPT_INDENT_2 if pretty else 0))
+    else:
+        text = json.dumps(obj, ensure_ascii=False, indent=2 if pretty else None, separators=None if pretty else (",", ":"))
+        data = (text + "\n").encode("utf-8")
     # Preserve compression state
     if path.name.endswith(".json.gz"):
-        with gzip.open(path, "wt", encoding="utf-8") as f:
-            json.dump(obj, f, ensure_ascii=False, indent=2 if pretty else None, separators=None if pretty else (",", ":"))
-            f.write("\n")
+        with gzip.open(path, "wb") as f:
+            f.write(data)
         return
-    with path.open("w", encoding="utf-8", newline="\n") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2 if pretty else None, separators=None if pretty else (",", ":"))
-        f.write("\n")
+    path.write_bytes(data)
 
 def sanitize(obj: Any) -> Tuple[Any, int]:
+    # Mutates in place: each file is parsed, sanitized and written once.
+    # Iterative walk: no Python frame per node and no recursion limit on deep files.
+    forbidden_keys = FORBIDDEN_KEYS
     removed = 0
-    if isinstance(obj, dict):
-        out: Dict[str, Any] = {}
-        for k, v in obj.items():
-            if k in FORBIDDEN_KEYS or "generated_at" in k:
-                removed += 1
-                continue
-            vv, rr = sanitize(v)
-            removed += rr
-            out[k] = vv
-        # Normalize schema.version to "1.0" if present
-        sch = out.get("schema")
-        if isinstance(sch, dict):
-            if "version" in sch and sch["version"] != "1.0":
-                sch["version"] = "1.0"
-        return out, removed
-    if isinstance(obj, list):
-        out_list = []
-        for x in obj:
-            xx, rr = sanitize(x)
-            removed += rr
-            out_list.append(xx)
-        return out_list, removed
-    return obj, 0
+    schemas = []
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if isinstance(o, dict):
+            drop = [k for k in o if k in forbidden_keys or "generated_at" in k]
+            for k in drop:
+                del o[k]
+            removed += len(drop)
+            sch = o.get("schema")
+            if isinstance(sch, dict) and "version" in sch:
+                schemas.append(sch)
+            stack.extend(v for v in o.values() if isinstance(v, (dict, list)))
+        elif isinstance(o, list):
+            stack.extend(x for x in o if isinstance(x, (dict, list)))
+    # Normalize schema.version to "1.0" if present (after the walk, so the old value was still scanned)
+    for sch in schemas:
+        sch["version"] = "1.0"
+    return obj, removed
+
+def _sanitize_one(fp: Path, write: bool, pretty: bool) -> Tuple[str, int]:
+    # Runs in a worker process: returns ("error"|"changed"|"unchanged", removed keys).
+    try:
+        obj = load_json(fp)
+    except Exception:
+        return "error", 0
+    sch = obj.get("schema") if isinstance(obj, dict) else None
+    version_fixed = isinstance(sch, dict) and "version" in sch and sch["version"] != "1.0"
+    new_obj, removed = sanitize(obj)
+    if removed > 0 or version_fixed:
+        if write:
+            dump_json(fp, new_obj, pretty=pretty)
+        return "changed", removed
+    return "unchanged", 0
 
 def main() -> int:
     p = argparse.ArgumentParser(description="Sanitize dataset JSON files (remove forbidden metadata keys, normalize schema.version).")
@@ -71,6 +116,7 @@ def main() -> int:
     p.add_argument("--write", action="store_true", help="Apply changes in-place. Without this flag, only reports changes.")
     p.add_argument("--pretty", action="store_true", help="Write pretty JSON when applying changes (default: minified).")
     p.add_argument("--max-files", type=int, default=0, help="If >0, limit number of files processed (for quick runs).")
+    p.add_argument("--jobs", type=int, default=0, help="Worker processes (default: 0 = all cores; 1 = serial).")
     args = p.parse_args()
 
     repo_root = Path(args.repo_root).resolve()
@@ -78,26 +124,21 @@ def main() -> int:
     if not data_root.exists():
         raise SystemExit(f"Data directory not found: {data_root}")
 
-    changed_files = 0
-    removed_total = 0
-    parse_errors = 0
-    processed = 0
+    paths = list(islice(iter_json_paths(data_root), args.max_files or None))
+    n = len(paths)
+    flags = ([args.write] * n, [args.pretty] * n)
+    # Files are independent and sanitizing is CPU-bound (gunzip + parse + rebuild).
+    workers = args.jobs or os.cpu_count() or 1
+    if workers == 1 or n < 4:
+        results = list(map(_sanitize_one, paths, *flags))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            results = list(ex.map(_sanitize_one, paths, *flags))
 
-    for fp in iter_json_paths(data_root):
-        processed += 1
-        if args.max_files and processed > args.max_files:
-            break
-        try:
-            obj = load_json(fp)
-        except Exception:
-            parse_errors += 1
-            continue
-        new_obj, removed = sanitize(obj)
-        if removed > 0 or (isinstance(new_obj, dict) and isinstance(new_obj.get("schema"), dict) and new_obj["schema"].get("version") == "1.0" and isinstance(obj, dict) and isinstance(obj.get("schema"), dict) and obj["schema"].get("version") != "1.0"):
-            changed_files += 1
-            removed_total += removed
-            if args.write:
-                dump_json(fp, new_obj, pretty=args.pretty)
+    processed = n
+    parse_errors = sum(1 for status, _ in results if status == "error")
+    changed_files = sum(1 for status, _ in results if status == "changed")
+    removed_total = sum(removed for _, removed in results)
 
     out = {
         "ok": parse_errors == 0,
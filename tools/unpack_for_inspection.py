@@ -6,6 +6,11 @@ import gzip
 import json
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is used otherwise
+    orjson = None
+
 def main() -> int:
     p = argparse.ArgumentParser(description="Inspect a .json.gz file (pretty-print or write decompressed .json).")
     p.add_argument("input", help="Path to .json.gz")
@@ -16,20 +21,21 @@ def main() -> int:
     if not inp.exists() or not inp.name.endswith(".json.gz"):
         raise SystemExit("Input must be an existing .json.gz file")
 
-    with gzip.open(inp, "rt", encoding="utf-8") as f:
-        obj = json.load(f)
-
-    text = json.dumps(obj, ensure_ascii=False, indent=2) + "\n"
+    data = gzip.decompress(inp.read_bytes())
+    if orjson is not None:
+        text = orjson.dumps(orjson.loads(data), option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE).decode("utf-8")
+    else:
+        text = json.dumps(json.loads(data), ensure_ascii=False, indent=2) + "\n"
     if args.output:
         out = Path(args.output).resolve()
         out.parent.mkdir(parents=True, exist_ok=True)
         out.write_text(text, encoding="utf-8", newline="\n")
     else:
         try:
-    print(text, end="")
-except BrokenPipeError:
-    # When piped to tools like `head`, stdout may close early.
-    return 0
+            print(text, end="")
+        except BrokenPipeError:
+            # When piped to tools like `head`, stdout may close early.
+            return 0
     return 0
 
 if __name__ == "__main__":
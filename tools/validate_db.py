@@ -3,25 +3,45 @@
 from __future__ import annotations
 
 import argparse
-import gzip
 import json
 import os
 import re
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from itertools import islice
 from pathlib import Path
-from typing import Any, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-FORBIDDEN_KEYS = {
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:  # optional speedup; stdlib json is used otherwise
+    json_loads = json.loads
+
+try:
+    from isal import igzip as gzip_mod
+except ImportError:  # optional speedup; stdlib gzip is used otherwise
+    import gzip as gzip_mod
+
+# Any key containing "generated_at" is forbidden too (see the key checks below).
+FORBIDDEN_KEYS = frozenset({
     "generated_at_utc", "generated_at", "created_at", "build_stamp", "built_at",
     "timestamp", "time_utc", "supersedes", "superseded_by",
-}
+})
 VERSION_SUFFIX_RE = re.compile(r"_v\d+\b", re.IGNORECASE)
 
+# Whatever scan_tree can flag appears verbatim in the raw UTF-8 text: keys and
+# strings can only hide these ASCII markers behind \uXXXX escapes.
+SCAN_MARKERS = tuple(k.encode("ascii") for k in FORBIDDEN_KEYS) + (b"generated_at", b"_v", b"_V")
+
 FAST_MAX_JSON_FILES = 250
 FAST_SKIP_LARGE_BYTES = 5 * 1024 * 1024
 FAST_JSONL_SAMPLE = 1
 FULL_JSONL_SAMPLE = 25
 
+# Bump when the per-file checks change so stale --scan-cache results are dropped.
+SCAN_CACHE_VERSION = 1
+
 
 def resolve_json_variant(path: Path) -> Optional[Path]:
     if path.exists():
@@ -37,56 +57,97 @@ def resolve_json_variant(path: Path) -> Optional[Path]:
     return None
 
 
-def load_json_any(path: Path) -> Any:
+def read_json_bytes(path: Path) -> bytes:
+    data = path.read_bytes()
     if path.name.endswith(".json.gz"):
-        with gzip.open(path, "rt", encoding="utf-8") as f:
-            return json.load(f)
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+        data = gzip_mod.decompress(data)
+    return data
+
+
+def load_json_any(path: Path) -> Any:
+    return json_loads(read_json_bytes(path))
 
 
 def iter_json_files(root: Path) -> Iterable[Path]:
-    for r, _, files in os.walk(root):
-        rp = Path(r)
-        for fn in files:
-            if fn.endswith(".json") or fn.endswith(".json.gz"):
-                yield rp / fn
+    # os.scandir walk in os.walk order (a directory's files, then its subdirectories;
+    # symlinked directories are not followed), keeping only matching entries.
+    try:
+        it = os.scandir(root)
+    except OSError:
+        return
+    files = []
+    subdirs = []
+    with it:
+        for entry in it:
+            if entry.is_dir():
+                if not entry.is_symlink():
+                    subdirs.append(entry.path)
+            elif entry.name.endswith(".json") or entry.name.endswith(".json.gz"):
+                files.append(entry)
+    yield from (Path(entry.path) for entry in files)
+    for d in subdirs:
+        yield from iter_json_files(d)
 
 
 def iter_jsonl_gz(path: Path):
-    with gzip.open(path, "rt", encoding="utf-8") as f:
+    # Streams on purpose: callers only sample the first few lines of each chunk.
+    with gzip_mod.open(path, "rb") as f:
         for line in f:
             line = line.strip()
             if not line:
                 continue
-            yield json.loads(line)
-
+            yield json_loads(line)
 
-def contains_forbidden(obj: Any) -> bool:
-    if isinstance(obj, dict):
-        for k, v in obj.items():
-            if k in FORBIDDEN_KEYS or "generated_at" in k:
-                return True
-            if contains_forbidden(v):
-                return True
-    elif isinstance(obj, list):
-        return any(contains_forbidden(x) for x in obj)
-    return False
 
+def scan_tree(obj: Any) -> Tuple[bool, bool]:
+    """Return (has_forbidden_key, has_version_suffix) from one pass over obj.
 
-def contains_version_suffix(obj: Any) -> bool:
+    Iterative walk: no Python frame per node and no recursion limit on deep
+    files. Stops as soon as both findings are known.
+    """
+    search = VERSION_SUFFIX_RE.search
+    forbidden_keys = FORBIDDEN_KEYS
     if isinstance(obj, str):
-        return VERSION_SUFFIX_RE.search(obj) is not None
-    if isinstance(obj, dict):
-        for k, v in obj.items():
-            if contains_version_suffix(k) or contains_version_suffix(v):
-                return True
-    elif isinstance(obj, list):
-        return any(contains_version_suffix(x) for x in obj)
-    return False
-
-
-@dataclass
+        return False, search(obj) is not None
+    # The regex only runs on strings that contain "_v"/"_V" (a plain substring
+    # test in C); almost no string does, and re.search costs far more per call.
+    forbidden = suffix = False
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if isinstance(o, dict):
+            for k, v in o.items():
+                if not forbidden and (k in forbidden_keys or "generated_at" in k):
+                    forbidden = True
+                if not suffix and (
+                    (("_v" in k or "_V" in k) and search(k) is not None)
+                    or (isinstance(v, str) and ("_v" in v or "_V" in v) and search(v) is not None)
+                ):
+                    suffix = True
+                if forbidden and suffix:
+                    return True, True
+                if isinstance(v, (dict, list)):
+                    stack.append(v)
+        elif isinstance(o, list):
+            for x in o:
+                if isinstance(x, str):
+                    if not suffix and ("_v" in x or "_V" in x) and search(x) is not None:
+                        suffix = True
+                        if forbidden:
+                            return True, True
+                elif isinstance(x, (dict, list)):
+                    stack.append(x)
+    return forbidden, suffix
+
+
+def may_need_scan(data: bytes) -> bool:
+    # False only when scan_tree is guaranteed to find nothing in this document.
+    if b"\\u" in data or not json.detect_encoding(data).startswith("utf-8"):
+        return True
+    return any(m in data for m in SCAN_MARKERS)
+
+
+@dataclass(frozen=True, slots=True)
 class Problem:
     code: str
     path: str
@@ -157,14 +218,12 @@ def validate_names(repo: Path, problems: List[Problem], mode: str) -> None:
             continue
 
         try:
-            n = 0
-            for obj in iter_jsonl_gz(core):
+            # islice stops the generator after `sample` rows, so only the first
+            # gzip block(s) of the chunk are ever inflated.
+            for obj in islice(iter_jsonl_gz(core), sample):
                 if not isinstance(obj, dict) or "id" not in obj:
                     add(problems, "names.entry_invalid", core, "Invalid entry in jsonl.gz (missing object/id)")
                     break
-                n += 1
-                if n >= sample:
-                    break
         except Exception as e:
             add(problems, "names.jsonl_read", core, f"Failed reading jsonl.gz: {e}")
 
@@ -182,6 +241,9 @@ def validate_search(repo: Path, problems: List[Problem]) -> None:
         return
 
     if m.get("has_names") is True:
+        # One directory listing instead of up to two stat calls per referenced shard.
+        with os.scandir(sdir) as it:
+            existing = {e.name for e in it}
         idx = m.get("names_index_files", {})
         for kind in ("surface","reading"):
             files = idx.get(kind, [])
@@ -189,8 +251,11 @@ def validate_search(repo: Path, problems: List[Problem]) -> None:
                 add(problems, "search.names_index_missing", man, f"names_index_files.{kind} missing/empty")
                 continue
             for fn in files:
-                p = resolve_json_variant(sdir/fn) or (sdir/fn)
-                if not p.exists():
+                if "/" in fn or os.sep in fn:
+                    found = resolve_json_variant(sdir/fn) is not None
+                else:
+                    found = fn in existing or (fn.endswith(".json") and fn + ".gz" in existing) or (fn.endswith(".json.gz") and fn[:-3] in existing)
+                if not found:
                     add(problems, "search.index_missing", sdir/fn, "Referenced index missing (.json or .json.gz)")
 
 
@@ -214,32 +279,106 @@ def validate_categories(repo: Path, problems: List[Problem]) -> None:
         add(problems, "categories.word_to_category_missing", cdir/"word_to_category.json", "Missing word_to_category.json(.gz)")
 
 
-def validate_forbidden_scan(repo: Path, problems: List[Problem], mode: str) -> None:
+def _scan_one(path: str, mode: str) -> List[Tuple[str, str, str]]:
+    # Runs in a worker process: returns plain (code, path, message) tuples.
+    fp = Path(path)
+    try:
+        if mode == "fast" and fp.stat().st_size > FAST_SKIP_LARGE_BYTES:
+            return []
+        data = read_json_bytes(fp)
+        obj = json_loads(data)
+    except Exception as e:
+        return [("json.parse_error", path, str(e))]
+    # Parsing is still needed to catch malformed files; the tree walk is not
+    # when no marker occurs anywhere in the raw text.
+    if not may_need_scan(data):
+        return []
+    forbidden, suffix = scan_tree(obj)
+    found = []
+    if forbidden:
+        found.append(("json.forbidden_key", path, "Found forbidden metadata key"))
+    if suffix:
+        found.append(("json.version_suffix", path, "Found _vN-like suffix in a string"))
+    return found
+
+
+def load_scan_cache(path: Path) -> Dict[str, list]:
+    # rel path -> [mtime_ns, size, [[code, message], ...]]
+    try:
+        obj = json_loads(path.read_bytes())
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(obj, dict) or obj.get("version") != SCAN_CACHE_VERSION or not isinstance(obj.get("files"), dict):
+        return {}
+    return obj["files"]
+
+
+def save_scan_cache(path: Path, files: Dict[str, list]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"version": SCAN_CACHE_VERSION, "files": files}, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(path)
+
+
+def validate_forbidden_scan(repo: Path, problems: List[Problem], mode: str, jobs: int = 0, cache_path: Optional[Path] = None) -> None:
     data = repo/"data"
-    checked = 0
-    for fp in iter_json_files(data):
-        checked += 1
-        if mode == "fast" and checked > FAST_MAX_JSON_FILES:
-            break
-        try:
-            if mode == "fast" and fp.stat().st_size > FAST_SKIP_LARGE_BYTES:
+    limit = FAST_MAX_JSON_FILES if mode == "fast" else None
+    paths = [str(fp) for fp in islice(iter_json_files(data), limit)]
+    results: List[List[Tuple[str, str, str]]] = [[] for _ in paths]
+    todo = list(range(len(paths)))
+
+    # Files whose mtime and size match the cache reuse their previous findings.
+    cache = load_scan_cache(cache_path) if cache_path else {}
+    root_prefix_len = len(os.path.join(str(repo), ""))
+    signatures: Dict[int, List[int]] = {}
+    if cache_path:
+        todo = []
+        for i, path in enumerate(paths):
+            try:
+                st = os.stat(path)
+            except OSError:
+                todo.append(i)
                 continue
-            obj = load_json_any(fp)
-        except Exception as e:
-            add(problems, "json.parse_error", fp, str(e))
-            continue
-        if contains_forbidden(obj):
-            add(problems, "json.forbidden_key", fp, "Found forbidden metadata key")
-        if contains_version_suffix(obj):
-            add(problems, "json.version_suffix", fp, "Found _vN-like suffix in a string")
+            if mode == "fast" and st.st_size > FAST_SKIP_LARGE_BYTES:
+                continue  # skipped, not scanned: nothing to cache
+            sig = [st.st_mtime_ns, st.st_size]
+            hit = cache.get(path[root_prefix_len:])
+            if isinstance(hit, list) and hit[:2] == sig:
+                results[i] = [(code, path, message) for code, message in hit[2]]
+                continue
+            signatures[i] = sig
+            todo.append(i)
+
+    todo_paths = [paths[i] for i in todo]
+    modes = [mode] * len(todo_paths)
+    # Files are independent and the scan is CPU-bound (gunzip + parse + walk).
+    workers = jobs or os.cpu_count() or 1
+    if workers == 1 or len(todo_paths) < 4:
+        scanned = list(map(_scan_one, todo_paths, modes))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            scanned = list(ex.map(_scan_one, todo_paths, modes))
+    for i, found in zip(todo, scanned):
+        results[i] = found
+
+    for found in results:
+        for code, path, message in found:
+            problems.append(Problem(code=code, path=path, message=message))
+
+    if cache_path and signatures:
+        for i, sig in signatures.items():
+            cache[paths[i][root_prefix_len:]] = sig + [[[code, message] for code, _, message in results[i]]]
+        save_scan_cache(cache_path, cache)
 
 
-def main() -> int:
+def main(argv: Optional[List[str]] = None) -> int:
     ap = argparse.ArgumentParser(description="CI-friendly structural validation for Nihonjindes DB.")
     ap.add_argument("--repo-root", default=".", help="Repository root (default: .)")
     ap.add_argument("--mode", choices=["fast","full"], default="fast", help="Validation mode")
     ap.add_argument("--max-errors", type=int, default=200, help="Max errors to report")
-    args = ap.parse_args()
+    ap.add_argument("--jobs", type=int, default=0, help="Worker processes for the JSON scan (default: 0 = all cores; 1 = serial).")
+    ap.add_argument("--scan-cache", default=None, help="JSON file (relative to repo-root) caching per-file scan results by mtime and size, e.g. .cache/validate_db.json (default: off).")
+    args = ap.parse_args(argv)
 
     repo = Path(args.repo_root).resolve()
     problems: List[Problem] = []
@@ -248,14 +387,14 @@ def main() -> int:
     validate_categories(repo, problems)
     validate_names(repo, problems, mode=args.mode)
     validate_search(repo, problems)
-    validate_forbidden_scan(repo, problems, mode=args.mode)
+    validate_forbidden_scan(repo, problems, mode=args.mode, jobs=args.jobs, cache_path=(repo / args.scan_cache) if args.scan_cache else None)
 
     ok = len(problems) == 0
     out = {
         "ok": ok,
         "mode": args.mode,
         "problem_count": len(problems),
-        "problems": [p.__dict__ for p in problems[:args.max_errors]],
+        "problems": [asdict(p) for p in problems[:args.max_errors]],
     }
     print(json.dumps(out, ensure_ascii=False, indent=2))
     return 0 if ok else 1
@@ -2,22 +2,67 @@
 from __future__ import annotations
 
 import argparse
-import gzip
 import json
 import random
+import re
 from pathlib import Path
 from typing import Any, Iterable, List, Optional, Set
 
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:  # optional speedup; stdlib json is used otherwise
+    json_loads = json.loads
 
-def load_json_any(path: Path) -> Any:
+try:
+    from isal import igzip as gzip_mod, isal_zlib as zlib_mod
+except ImportError:  # optional speedup; stdlib gzip/zlib are used otherwise
+    import gzip as gzip_mod
+    import zlib as zlib_mod
+
+
+def gunzip(data: bytes) -> bytes:
+    # Single-member streams (what the build writes) inflate in one zlib call,
+    # skipping gzip.decompress's member loop; anything else - several members,
+    # trailing bytes, truncation, a bad header - goes through gzip_mod, which
+    # also produces the usual error messages.
+    try:
+        d = zlib_mod.decompressobj(wbits=31)
+        out = d.decompress(data)
+    except zlib_mod.error:
+        return gzip_mod.decompress(data)
+    if d.eof and not d.unused_data:
+        return out
+    return gzip_mod.decompress(data)
+
+
+def read_json_bytes(path: Path) -> bytes:
+    data = path.read_bytes()
     if path.name.endswith(".json.gz"):
-        with gzip.open(path, "rt", encoding="utf-8") as f:
-            return json.load(f)
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+        data = gunzip(data)
+    return data
+
+
+def check_not_truncated(data: bytes) -> None:
+    # A document that opens with { or [ must close with the matching bracket.
+    # Catching a cut-off (or trailing-garbage) file here skips a full parse that
+    # would fail at its end.
+    first = data[:64].lstrip()[:1]
+    if first in (b"{", b"["):
+        closing = b"}" if first == b"{" else b"]"
+        last = data[-64:].rstrip()[-1:]
+        if last and last != closing:
+            raise ValueError(f"Truncated or trailing data: document opens with {first.decode()!r} but does not end with {closing.decode()!r}")
+
+
+def load_json_any(path: Path) -> Any:
+    data = read_json_bytes(path)
+    check_not_truncated(data)
+    return json_loads(data)
 
 
 def resolve_variant(path: Path) -> Optional[Path]:
+    # Only ever returns an existing path, so callers need no second exists().
     if path.exists():
         return path
     if path.name.endswith(".json") and (path.with_name(path.name + ".gz")).exists():
@@ -27,13 +72,30 @@ def resolve_variant(path: Path) -> Optional[Path]:
     return None
 
 
-def iter_jsonl_gz(path: Path) -> Iterable[dict]:
-    with gzip.open(path, "rt", encoding="utf-8") as f:
+# Minified names rows start with their integer id: `{"id":5000000,...`.
+ROW_ID_RE = re.compile(rb'\{"id":(-?\d+)[,}]')
+NOT_A_ROW = object()
+
+
+def iter_jsonl_ids(path: Path) -> Iterable[Any]:
+    """Yield each row's "id" (NOT_A_ROW for non-object lines).
+
+    Rows in the minified layout are matched on their leading bytes without a
+    JSON parse; any other line is parsed as before.
+    """
+    with gzip_mod.open(path, "rb") as f:
         for line in f:
             line = line.strip()
             if not line:
                 continue
-            yield json.loads(line)
+            m = ROW_ID_RE.match(line)
+            if m:
+                yield int(m.group(1))
+                continue
+            row = json_loads(line)
+            if row is None:
+                return  # a null row ends the comparison, as it always has
+            yield row.get("id") if isinstance(row, dict) else NOT_A_ROW
 
 
 def fail(problems: List[dict], code: str, path: str, message: str) -> None:
@@ -58,23 +120,23 @@ def load_word_id_set(repo: Path, max_ids: int = 0) -> Set[int]:
     ]
     for c in candidates:
         p = resolve_variant(c)
-        if p and p.exists():
+        if p:
             obj = load_json_any(p)
             if isinstance(obj, dict) and isinstance(obj.get("ids"), list):
                 ids = obj["ids"]
                 if max_ids and max_ids > 0:
                     ids = ids[:max_ids]
-                return set(int(x) for x in ids)
+                return set(map(int, ids))
             if isinstance(obj, list):
-                return set(int(x) for x in (obj if not max_ids else obj[:max_ids]))
+                return set(map(int, obj if not max_ids else obj[:max_ids]))
     return set()
 
 
 def validate_categories_words_exist(repo: Path, problems: List[dict], mode: str) -> None:
     cdir = repo / "data" / "categories"
-    w2c = resolve_variant(cdir / "word_to_category.json") or (cdir / "word_to_category.json")
-    if not w2c.exists():
-        fail(problems, "categories.missing_word_to_category", str(w2c), "Missing word_to_category.json(.gz)")
+    w2c = resolve_variant(cdir / "word_to_category.json")
+    if w2c is None:
+        fail(problems, "categories.missing_word_to_category", str(cdir / "word_to_category.json"), "Missing word_to_category.json(.gz)")
         return
 
     mapping = load_json_any(w2c)
@@ -117,7 +179,7 @@ def validate_kanji_order_exists(repo: Path, problems: List[dict], mode: str) ->
     lo_path = None
     for c in candidates:
         p = resolve_variant(c)
-        if p and p.exists():
+        if p:
             lo_path = p
             break
     if not lo_path:
@@ -144,7 +206,7 @@ def validate_kanji_order_exists(repo: Path, problems: List[dict], mode: str) ->
     ]
     for c in kanji_entries_candidates:
         p = resolve_variant(c)
-        if p and p.exists():
+        if p:
             kobj = load_json_any(p)
             if isinstance(kobj, dict) and isinstance(kobj.get("entries"), list):
                 for e in kobj["entries"]:
@@ -191,27 +253,27 @@ def validate_names_chunks_consistent(repo: Path, problems: List[dict], mode: str
             continue
 
         try:
-            core_iter = iter_jsonl_gz(core)
-            en_iter = iter_jsonl_gz(en)
+            core_iter = iter_jsonl_ids(core)
+            en_iter = iter_jsonl_ids(en)
             for _ in range(5 if mode == "fast" else 50):
-                c = next(core_iter, None)
-                e = next(en_iter, None)
-                if c is None or e is None:
+                c = next(core_iter, StopIteration)
+                e = next(en_iter, StopIteration)
+                if c is StopIteration or e is StopIteration:
                     break
-                if isinstance(c, dict) and isinstance(e, dict) and c.get("id") != e.get("id"):
-                    fail(problems, "names.chunk_id_mismatch", str(core), f"Core/en id mismatch: {c.get('id')} != {e.get('id')}")
+                if c is not NOT_A_ROW and e is not NOT_A_ROW and c != e:
+                    fail(problems, "names.chunk_id_mismatch", str(core), f"Core/en id mismatch: {c} != {e}")
                     break
         except Exception as ex:
             fail(problems, "names.chunk_read_error", str(core), f"Failed reading names chunks: {ex}")
 
 
-def main() -> int:
+def main(argv: Optional[List[str]] = None) -> int:
     ap = argparse.ArgumentParser(description="Validate cross-file relations and referential integrity.")
     ap.add_argument("--repo-root", default=".", help="Repository root (default: .)")
     ap.add_argument("--mode", choices=["fast", "full"], default="fast", help="fast=sampling, full=more exhaustive")
     ap.add_argument("--max-errors", type=int, default=200, help="Max errors to report")
     ap.add_argument("--seed", type=int, default=12345, help="Random seed for sampling")
-    args = ap.parse_args()
+    args = ap.parse_args(argv)
 
     random.seed(args.seed)
 
@@ -4,7 +4,7 @@ from __future__ import annotations
 import argparse
 import json
 import os
-from pathlib import Path
+from pathlib import Path, PurePath
 from typing import List
 
 ALLOWED_SOURCE_ARCHIVES = {
@@ -18,6 +18,14 @@ ALLOWED_SOURCE_ARCHIVES = {
 DISALLOWED_EXTENSIONS = {
     ".zip", ".tar", ".gz", ".tgz", ".bz2", ".xz", ".7z"
 }
+DISALLOWED_SUFFIXES = tuple(DISALLOWED_EXTENSIONS)
+
+# Never part of the committed tree: VCS metadata, virtualenvs and tool caches.
+# __pycache__, sources/ and build outputs are still scanned on purpose.
+SKIP_DIRS = frozenset({
+    ".git", ".hg", ".svn", "node_modules", ".venv", "venv",
+    ".mypy_cache", ".pytest_cache", ".ruff_cache", ".tox", ".nox", ".cache",
+})
 
 # Note: we DO allow .gz globally because the dataset uses .json.gz/.jsonl.gz.
 # We therefore only disallow archives other than dataset compression, via a path-based filter.
@@ -37,29 +45,36 @@ def main() -> int:
 
     problems: List[dict] = []
 
-    # 1) __pycache__
+    # repo is resolved and os.walk paths start with it, so relative paths are string slices.
+    root_prefix_len = len(os.path.join(str(repo), ""))
+
+    # One walk serves both checks; archive problems are still reported after
+    # all bytecode problems.
+    archive_problems: List[dict] = []
     for r, dirs, files in os.walk(repo):
-        rp = Path(r)
+        # 1) __pycache__
         if "__pycache__" in dirs:
-            problems.append({"code": "pycache", "path": str((rp/"__pycache__").relative_to(repo)), "message": "__pycache__ directory must not be committed"})
+            problems.append({"code": "pycache", "path": os.path.join(r, "__pycache__")[root_prefix_len:], "message": "__pycache__ directory must not be committed"})
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
         for fn in files:
             if fn.endswith(".pyc") or fn.endswith(".pyo"):
-                problems.append({"code": "pyc", "path": str((rp/fn).relative_to(repo)), "message": "Python bytecode must not be committed"})
+                problems.append({"code": "pyc", "path": os.path.join(r, fn)[root_prefix_len:], "message": "Python bytecode must not be committed"})
+                continue
 
-    # 2) Disallowed archives (except sources + dataset .json.gz/.jsonl.gz)
-    for r, _, files in os.walk(repo):
-        rp = Path(r)
-        for fn in files:
-            p = rp / fn
-            rel = str(p.relative_to(repo)).replace(os.sep, "/")
-            suffix = p.suffix.lower()
+            # 2) Disallowed archives (except sources + dataset .json.gz/.jsonl.gz)
+            # Cheap name test first; only candidates get a Path for the exact suffix rule.
+            if not fn.lower().endswith(DISALLOWED_SUFFIXES):
+                continue
+            rel = os.path.join(r, fn)[root_prefix_len:].replace(os.sep, "/")
+            suffix = PurePath(fn).suffix.lower()
             if suffix in DISALLOWED_EXTENSIONS:
                 if rel in ALLOWED_SOURCE_ARCHIVES:
                     continue
                 if is_dataset_gz(rel):
                     continue
                 # Allow sources/*.gz and sources/*.zip only if in allowlist above
-                problems.append({"code": "archive", "path": rel, "message": "Archive file should not be committed (except allowlisted upstream sources and dataset compression)"})
+                archive_problems.append({"code": "archive", "path": rel, "message": "Archive file should not be committed (except allowlisted upstream sources and dataset compression)"})
+    problems.extend(archive_problems)
 
     ok = len(problems) == 0
     out = {"ok": ok, "problem_count": len(problems), "problems": problems[: args.max_problems]}
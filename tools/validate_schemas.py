@@ -3,23 +3,79 @@
 from __future__ import annotations
 
 import argparse
-import gzip
+import functools
 import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, List
+from typing import Any, List, Optional, Tuple
 
 import jsonschema
 
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:  # optional speedup; stdlib json is used otherwise
+    json_loads = json.loads
 
-def load_json_any(path: Path) -> Any:
+try:
+    from isal import igzip as gzip_mod, isal_zlib as zlib_mod
+except ImportError:  # optional speedup; stdlib gzip/zlib are used otherwise
+    import gzip as gzip_mod
+    import zlib as zlib_mod
+
+try:
+    import fastjsonschema
+except ImportError:  # optional speedup; jsonschema alone is used otherwise
+    fastjsonschema = None
+
+# Fast mode validates a seeded sample of category item files rather than all.
+FAST_ITEM_SAMPLE = 8
+
+
+def gunzip(data: bytes) -> bytes:
+    # Single-member streams (what the build writes) inflate in one zlib call,
+    # skipping gzip.decompress's member loop; anything else - several members,
+    # trailing bytes, truncation, a bad header - goes through gzip_mod, which
+    # also produces the usual error messages.
+    try:
+        d = zlib_mod.decompressobj(wbits=31)
+        out = d.decompress(data)
+    except zlib_mod.error:
+        return gzip_mod.decompress(data)
+    if d.eof and not d.unused_data:
+        return out
+    return gzip_mod.decompress(data)
+
+
+def read_json_bytes(path: Path) -> bytes:
+    data = path.read_bytes()
     if path.name.endswith(".json.gz"):
-        with gzip.open(path, "rt", encoding="utf-8") as f:
-            return json.load(f)
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+        data = gunzip(data)
+    return data
+
+
+def check_not_truncated(data: bytes) -> None:
+    # A document that opens with { or [ must close with the matching bracket.
+    # Catching a cut-off (or trailing-garbage) file here skips a full parse that
+    # would fail at its end.
+    first = data[:64].lstrip()[:1]
+    if first in (b"{", b"["):
+        closing = b"}" if first == b"{" else b"]"
+        last = data[-64:].rstrip()[-1:]
+        if last and last != closing:
+            raise ValueError(f"Truncated or trailing data: document opens with {first.decode()!r} but does not end with {closing.decode()!r}")
+
+
+def load_json_any(path: Path) -> Any:
+    data = read_json_bytes(path)
+    check_not_truncated(data)
+    return json_loads(data)
 
 
 def resolve_variant(path: Path) -> Path | None:
+    # Only ever returns an existing path, so callers need no second exists().
     if path.exists():
         return path
     if path.name.endswith(".json") and (path.with_name(path.name + ".gz")).exists():
@@ -29,26 +85,71 @@ def resolve_variant(path: Path) -> Path | None:
     return None
 
 
-def validate_one(file_path: Path, schema_path: Path, label: str, problems: List[dict]) -> None:
+@functools.lru_cache(maxsize=None)
+def compiled_validator(schema_path: Path) -> Any:
+    # Read, check and build each schema once; failures are not cached and
+    # re-raise for every file that uses the schema, as before.
+    schema = json.loads(schema_path.read_text(encoding="utf-8"))
+    cls = jsonschema.validators.validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
+
+
+@functools.lru_cache(maxsize=None)
+def fast_validator(schema_path: Path) -> Any:
+    """Return a fastjsonschema-generated validator, or None if unavailable."""
+    if fastjsonschema is None:
+        return None
+    try:
+        compiled_validator(schema_path)  # invalid schemas keep their schema_error
+        return fastjsonschema.compile(json.loads(schema_path.read_text(encoding="utf-8")))
+    except Exception:
+        return None  # unsupported keyword etc.: jsonschema handles this schema
+
+
+def validate_one(file_path: Path, schema_path: Path, label: str) -> Optional[dict]:
     try:
         obj = load_json_any(file_path)
     except Exception as e:
-        problems.append({"type": "parse_error", "label": label, "path": str(file_path), "error": str(e)})
-        return
+        return {"type": "parse_error", "label": label, "path": str(file_path), "error": str(e)}
+    fast = fast_validator(schema_path)
+    if fast is not None:
+        try:
+            fast(obj)
+            return None
+        except Exception:
+            pass  # let jsonschema produce the reported message
     try:
-        schema = json.loads(schema_path.read_text(encoding="utf-8"))
-        jsonschema.validate(instance=obj, schema=schema)
+        # Same result as jsonschema.validate: report the best-matching error.
+        error = jsonschema.exceptions.best_match(compiled_validator(schema_path).iter_errors(obj))
+        if error is not None:
+            raise error
     except Exception as e:
-        problems.append({"type": "schema_error", "label": label, "path": str(file_path), "error": str(e)})
+        return {"type": "schema_error", "label": label, "path": str(file_path), "error": str(e)}
+    return None
 
 
-def main() -> int:
+def validate_all(checks: List[Tuple[Path, Path, str]], jobs: int = 0) -> List[Optional[dict]]:
+    """Run validate_one over (file, schema, label) checks, results in input order."""
+    # Files are independent and validation is CPU-bound pure Python, so it
+    # needs processes rather than threads; each worker compiles its schemas once.
+    files, schemas, labels = (list(col) for col in zip(*checks)) if checks else ([], [], [])
+    workers = jobs or os.cpu_count() or 1
+    if workers == 1 or len(checks) < 4:
+        return list(map(validate_one, files, schemas, labels))
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(validate_one, files, schemas, labels))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
     ap = argparse.ArgumentParser(description="Validate selected dataset files against JSON Schemas (CI-friendly).")
     ap.add_argument("--repo-root", default=".", help="Repository root (default: .)")
     ap.add_argument("--schema-dir", default="schemas", help="Schema directory (default: schemas)")
     ap.add_argument("--mode", choices=["fast","full"], default="fast", help="Validation mode")
     ap.add_argument("--max-errors", type=int, default=200, help="Max errors to report")
-    args = ap.parse_args()
+    ap.add_argument("--seed", type=int, default=12345, help="Random seed for fast-mode sampling")
+    ap.add_argument("--jobs", type=int, default=0, help="Worker processes for validation (default: 0 = all cores; 1 = serial).")
+    args = ap.parse_args(argv)
 
     repo = Path(args.repo_root).resolve()
     sdir = (repo / args.schema_dir).resolve()
@@ -59,7 +160,14 @@ def main() -> int:
     if not data.exists():
         raise SystemExit(f"Missing data directory: {data}")
 
-    problems: List[dict] = []
+    # Problems found while collecting checks are kept in place as dicts; None
+    # marks where the next check's result goes, so the report order is stable.
+    slots: List[Optional[dict]] = []
+    checks: List[Tuple[Path, Path, str]] = []
+
+    def check(p: Path, schema_name: str, label: str) -> None:
+        slots.append(None)
+        checks.append((p, sdir/schema_name, label))
 
     core = [
         ("data/manifest.json", "manifest.schema.json", "global manifest"),
@@ -68,36 +176,45 @@ def main() -> int:
         ("data/names/meta.json", "names_meta.schema.json", "names meta"),
     ]
     for rel, sch, label in core:
-        p = resolve_variant(repo/rel) or (repo/rel)
-        if not p.exists():
-            problems.append({"type": "missing", "label": label, "path": rel})
+        p = resolve_variant(repo/rel)
+        if p is None:
+            slots.append({"type": "missing", "label": label, "path": rel})
             continue
-        validate_one(p, sdir/sch, label, problems)
+        check(p, sch, label)
 
     items_dir = data/"categories/items"
     if items_dir.exists():
         files = sorted(list(items_dir.glob("*.json")) + list(items_dir.glob("*.json.gz")))
         if files:
-            picks = files[:1] if args.mode == "fast" else files
+            picks = files
+            if args.mode == "fast":
+                picks = sorted(random.Random(args.seed).sample(files, min(FAST_ITEM_SAMPLE, len(files))))
             for p in picks:
-                validate_one(p, sdir/"category_items.schema.json", "category items", problems)
+                check(p, "category_items.schema.json", "category items")
         else:
-            problems.append({"type": "missing", "label": "category items", "path": str(items_dir)})
+            slots.append({"type": "missing", "label": "category items", "path": str(items_dir)})
     else:
-        problems.append({"type": "missing", "label": "category items dir", "path": str(items_dir)})
+        slots.append({"type": "missing", "label": "category items dir", "path": str(items_dir)})
 
     if args.mode == "full":
         search_dir = data/"search/search"
         if search_dir.exists():
             idx_files = sorted([p for p in search_dir.iterdir() if p.name != "manifest.json" and (p.name.endswith(".json") or p.name.endswith(".json.gz"))])
             for p in idx_files:
-                validate_one(p, sdir/"search_index.schema.json", "search index", problems)
+                check(p, "search_index.schema.json", "search index")
 
         lookup_dir = data/"lookup/index"
         if lookup_dir.exists():
             idx_files = sorted([p for p in lookup_dir.iterdir() if p.name != "manifest.json" and (p.name.endswith(".json") or p.name.endswith(".json.gz"))])
             for p in idx_files:
-                validate_one(p, sdir/"lookup_index.schema.json", "lookup index", problems)
+                check(p, "lookup_index.schema.json", "lookup index")
+
+    results = iter(validate_all(checks, args.jobs))
+    problems: List[dict] = []
+    for slot in slots:
+        found = slot if slot is not None else next(results)
+        if found is not None:
+            problems.append(found)
 
     ok = len(problems) == 0
     out = {"ok": ok, "mode": args.mode, "problem_count": len(problems), "problems": problems[:args.max_errors]}
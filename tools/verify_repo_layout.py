@@ -2,46 +2,134 @@
 from __future__ import annotations
 
 import argparse
-import gzip
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Iterator, Optional, Tuple, Union
 
-FORBIDDEN_KEYS = {
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:  # optional speedup; stdlib json is used otherwise
+    json_loads = json.loads
+
+try:
+    from isal import igzip as gzip_mod, isal_zlib as zlib_mod
+except ImportError:  # optional speedup; stdlib gzip/zlib are used otherwise
+    import gzip as gzip_mod
+    import zlib as zlib_mod
+
+# Any key containing "generated_at" is forbidden too (see contains_forbidden_keys).
+FORBIDDEN_KEYS = frozenset({
     "generated_at_utc", "generated_at", "created_at", "build_stamp",
     "built_at", "timestamp", "time_utc", "supersedes", "superseded_by",
-}
-
-def load_json_maybe_gz(path: Path):
-    if path.suffixes[-2:] == [".json", ".gz"]:
-        with gzip.open(path, "rt", encoding="utf-8") as f:
-            return json.load(f)
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
-
-def walk_json_files(root: Path):
-    for r, _, files in os.walk(root):
-        rp = Path(r)
-        for fn in files:
-            if fn.endswith(".json") or fn.endswith(".json.gz"):
-                yield rp / fn
+})
+
+# Never part of the committed tree: VCS metadata, virtualenvs and tool caches.
+SKIP_DIRS = frozenset({
+    ".git", ".hg", ".svn", "node_modules", ".venv", "venv",
+    ".mypy_cache", ".pytest_cache", ".ruff_cache", ".tox", ".nox", ".cache",
+})
+
+# Any key contains_forbidden_keys can flag appears verbatim in the raw UTF-8
+# text, unless it is spelled with \uXXXX escapes.
+FORBIDDEN_MARKERS = tuple(k.encode("ascii") for k in FORBIDDEN_KEYS) + (b"generated_at",)
+
+def gunzip(data: bytes) -> bytes:
+    # Single-member streams (what the build writes) inflate in one zlib call,
+    # skipping gzip.decompress's member loop; anything else - several members,
+    # trailing bytes, truncation, a bad header - goes through gzip_mod, which
+    # also produces the usual error messages.
+    try:
+        d = zlib_mod.decompressobj(wbits=31)
+        out = d.decompress(data)
+    except zlib_mod.error:
+        return gzip_mod.decompress(data)
+    if d.eof and not d.unused_data:
+        return out
+    return gzip_mod.decompress(data)
+
+def read_json_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(".json.gz"):
+        data = gunzip(data)
+    return data
+
+def check_not_truncated(data: bytes) -> None:
+    # A document that opens with { or [ must close with the matching bracket.
+    # Catching a cut-off (or trailing-garbage) file here skips a full parse that
+    # would fail at its end.
+    first = data[:64].lstrip()[:1]
+    if first in (b"{", b"["):
+        closing = b"}" if first == b"{" else b"]"
+        last = data[-64:].rstrip()[-1:]
+        if last and last != closing:
+            raise ValueError(f"Truncated or trailing data: document opens with {first.decode()!r} but does not end with {closing.decode()!r}")
+
+def load_json_maybe_gz(path: str):
+    data = read_json_bytes(path)
+    check_not_truncated(data)
+    return json_loads(data.decode("utf-8"))
+
+def walk_json_files(root: Union[str, Path]) -> Iterator[str]:
+    # os.scandir walk in os.walk order (a directory's files, then its
+    # subdirectories; symlinked directories are not followed), yielding str
+    # paths so no Path is built per file.
+    try:
+        it = os.scandir(root)
+    except OSError:
+        return
+    files = []
+    subdirs = []
+    with it:
+        for entry in it:
+            if entry.is_dir():
+                if not entry.is_symlink() and entry.name not in SKIP_DIRS:
+                    subdirs.append(entry.path)
+            elif entry.name.endswith(".json") or entry.name.endswith(".json.gz"):
+                files.append(entry.path)
+    yield from files
+    for d in subdirs:
+        yield from walk_json_files(d)
 
 def contains_forbidden_keys(obj) -> bool:
-    if isinstance(obj, dict):
-        for k, v in obj.items():
-            if k in FORBIDDEN_KEYS or "generated_at" in k:
-                return True
-            if contains_forbidden_keys(v):
-                return True
-    elif isinstance(obj, list):
-        for x in obj:
-            if contains_forbidden_keys(x):
-                return True
+    stack = [obj]
+    while stack:
+        x = stack.pop()
+        if isinstance(x, dict):
+            for k, v in x.items():
+                if k in FORBIDDEN_KEYS or "generated_at" in k:
+                    return True
+                if isinstance(v, (dict, list)):
+                    stack.append(v)
+        elif isinstance(x, list):
+            stack.extend(v for v in x if isinstance(v, (dict, list)))
     return False
 
+def may_contain_forbidden_keys(data: bytes) -> bool:
+    # False only when contains_forbidden_keys is guaranteed to find nothing.
+    return b"\\u" in data or any(m in data for m in FORBIDDEN_MARKERS)
+
+def _scan_one(fp: str) -> Tuple[str, Optional[str]]:
+    """Return (fp, problem) where problem is a parse error message, "forbidden", or None."""
+    try:
+        data = read_json_bytes(fp)
+        check_not_truncated(data)
+        obj = json_loads(data.decode("utf-8"))
+    except Exception as e:
+        return fp, f"JSON parse failed: {fp} ({e})"
+    # Every file is still parsed so malformed JSON is reported; the walk is
+    # only needed when the raw text could hold a forbidden key.
+    if may_contain_forbidden_keys(data) and contains_forbidden_keys(obj):
+        return fp, "forbidden"
+    return fp, None
+
 def main() -> int:
     p = argparse.ArgumentParser(description="Verify repo dataset layout and forbidden metadata keys.")
     p.add_argument("--root", default=".", help="Repository root (default: .)")
+    p.add_argument("--jobs", type=int, default=0, help="Worker processes for the forbidden-key scan (default: 0 = all cores; 1 = serial).")
     args = p.parse_args()
 
     root = Path(args.root).resolve()
@@ -60,22 +148,31 @@ def main() -> int:
         if not req.exists():
             problems.append(f"Missing required file: {req}")
 
-    # Forbidden keys scan (best-effort; may be heavy on full dataset)
+    # Forbidden keys scan (best-effort; may be heavy on full dataset).
+    # Files are independent, so gunzip + parse run across worker processes;
+    # results are consumed in walk order so the report matches a serial run.
     checked = 0
     forbidden_hits = 0
-    for fp in walk_json_files(data_dir):
-        checked += 1
-        try:
-            obj = load_json_maybe_gz(fp)
-        except Exception as e:
-            problems.append(f"JSON parse failed: {fp} ({e})")
-            continue
-        if contains_forbidden_keys(obj):
+    paths = list(walk_json_files(data_dir))
+    workers = args.jobs or os.cpu_count() or 1
+    ex = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(paths) >= 4 else None
+    try:
+        results = ex.map(_scan_one, paths, chunksize=16) if ex else map(_scan_one, paths)
+        for fp, problem in results:
+            checked += 1
+            if problem is None:
+                continue
+            if problem != "forbidden":
+                problems.append(problem)
+                continue
             forbidden_hits += 1
             problems.append(f"Forbidden metadata key found in: {fp}")
             if forbidden_hits >= 50:
                 problems.append("Too many forbidden-key hits; stopping scan early.")
                 break
+    finally:
+        if ex:
+            ex.shutdown(cancel_futures=True)
 
     out = {
         "ok": len(problems) == 0,